@@ -0,0 +1,329 @@
+from fastapi import APIRouter, Header, HTTPException, Request, Response, status
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timezone
+from postgrest import SyncPostgrestClient
+from db import supabase
+import gzip
+import hashlib
+import json
+import os
+
+router = APIRouter()
+
+# Only these columns are put on the wire; answer keys are never part of a
+# session snapshot.
+QUESTION_FIELDS = [
+    "id", "question_text", "question_type",
+    "option_a", "option_b", "option_c", "option_d",
+]
+REVIEW_FIELDS = QUESTION_FIELDS + ["correct_answer", "explanation"]
+ANSWER_KEY_FIELDS = ["id", "correct_answer"]
+
+class TestSubmission(BaseModel):
+    answers: Dict[str, str]
+
+def _encode_snapshot(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Serialize a snapshot once and keep both the plain and gzip bodies"""
+    body = json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+    digest = hashlib.sha1(body).hexdigest()
+    return {
+        "body": body,
+        "gzip": gzip.compress(body),
+        "etag": f'"{digest}"',
+        "gzip_etag": f'"{digest}-gzip"',
+    }
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """Whether an Accept-Encoding header allows gzip, honouring q-values"""
+    gzip_q = None
+    wildcard_q = None
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value.strip())
+                except ValueError:
+                    q = 0.0
+        if coding in ("gzip", "x-gzip"):
+            gzip_q = q
+        elif coding == "*":
+            wildcard_q = q
+    if gzip_q is not None:
+        return gzip_q > 0
+    return wildcard_q is not None and wildcard_q > 0
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+def _snapshot_response(request: Request, payload: Dict[str, Any], private: bool) -> Response:
+    """Send a snapshot gzip-compressed when the client allows it, or 304 if it is unchanged
+
+    Snapshots are not cached server-side: every request has to run its own
+    visibility and row-level security checks anyway, and the ETag lets the
+    browser keep the snapshot and revalidate it without a body.
+    """
+    snapshot = _encode_snapshot(payload)
+    use_gzip = _accepts_gzip(request.headers.get("accept-encoding", ""))
+    etag = snapshot["gzip_etag"] if use_gzip else snapshot["etag"]
+    headers = {
+        "ETag": etag,
+        "Vary": "Accept-Encoding, Authorization",
+        "Cache-Control": "private, no-cache" if private else "no-cache",
+    }
+    if _etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=snapshot["gzip"], media_type="application/json", headers=headers)
+    return Response(content=snapshot["body"], media_type="application/json", headers=headers)
+
+def _bearer_token(authorization: Optional[str]) -> Optional[str]:
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return None
+    return authorization.split(" ", 1)[1].strip() or None
+
+def _get_request_user(token: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Resolve the Supabase user from a Bearer token, or None for anonymous requests"""
+    if not token:
+        return None
+    try:
+        response = supabase.auth.get_user(token)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired session. Please log in again."
+        )
+    if not response or not response.user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired session. Please log in again."
+        )
+    return {"id": response.user.id, "email": response.user.email}
+
+def _rest_client(token: Optional[str]) -> SyncPostgrestClient:
+    """PostgREST client for a single request, authorised as the caller
+
+    The shared `supabase` client carries whichever session last logged in
+    through /auth/login, so table access never goes through it. With the
+    anon SUPABASE_KEY, row-level security applies exactly as it did when
+    these queries ran in the browser.
+    """
+    key = os.getenv("SUPABASE_KEY", "")
+    return SyncPostgrestClient(
+        f"{os.getenv('SUPABASE_URL', '').rstrip('/')}/rest/v1",
+        headers={
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+            "apikey": key,
+            "Authorization": f"Bearer {token or key}",
+        },
+    )
+
+def _is_admin(db: SyncPostgrestClient, user_id: str) -> bool:
+    response = db.from_("profiles").select("is_admin").eq("id", user_id).maybe_single().execute()
+    return bool(response and response.data and response.data.get("is_admin"))
+
+def _fetch_test(db: SyncPostgrestClient, test_id: str, user: Optional[Dict[str, Any]], check_visibility: bool = True) -> Dict[str, Any]:
+    """Fetch a test row, applying the same visibility rules as the TakeTest page unless told not to"""
+    query = db.from_("tests").select("*").eq("id", test_id)
+    if check_visibility:
+        if user is None:
+            query = query.eq("is_published", True)
+        elif not _is_admin(db, user["id"]):
+            query = query.or_(f"is_published.eq.true,user_id.eq.{user['id']}")
+
+    response = query.maybe_single().execute()
+    if not response or not response.data:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Test not found"
+        )
+    return response.data
+
+def _test_metadata(test: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": test.get("id"),
+        "title": test.get("title"),
+        "description": test.get("description"),
+        "difficulty": test.get("difficulty"),
+        "topics": test.get("topics"),
+        "time_limit": test.get("time_limit"),
+    }
+
+def _fetch_questions(db: SyncPostgrestClient, test_id: str, fields: List[str], question_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Fetch the approved questions of a test, optionally limited to the given ids"""
+    query = db.from_("questions").select(",".join(fields)).eq("test_id", test_id).eq("approved", True)
+    if question_ids is not None:
+        if not question_ids:
+            return []
+        query = query.in_("id", question_ids)
+    response = query.order("id").execute()
+    return response.data or []
+
+def _answer_status(question: Dict[str, Any], user_answer: Optional[str]) -> str:
+    if not user_answer:
+        return "unanswered"
+    if user_answer.lower() == (question.get("correct_answer") or "").lower():
+        return "correct"
+    return "incorrect"
+
+def _score(answer_key: List[Dict[str, Any]], answers: Dict[str, str]) -> Dict[str, Any]:
+    correct = sum(
+        1 for q in answer_key
+        if _answer_status(q, answers.get(str(q["id"]))) == "correct"
+    )
+    return {
+        "score": correct / len(answer_key) * 100,
+        "correct_answers": correct,
+        "total_questions": len(answer_key),
+    }
+
+@router.get("/{test_id}/session")
+async def get_test_session(test_id: str, request: Request, authorization: Optional[str] = Header(None)):
+    """Test metadata and questions (without answers) for taking a test, in one response"""
+    try:
+        if not supabase:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Test service is not available. Please check Supabase configuration."
+            )
+        token = _bearer_token(authorization)
+        user = _get_request_user(token)
+        with _rest_client(token) as db:
+            test = _fetch_test(db, test_id, user)
+            questions = _fetch_questions(db, test_id, QUESTION_FIELDS)
+
+        return _snapshot_response(request, {
+            "test": _test_metadata(test),
+            "questions": questions,
+        }, private=user is not None)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to load test: {str(e)}"
+        )
+
+@router.get("/{test_id}/results")
+async def get_test_results(test_id: str, request: Request, authorization: Optional[str] = Header(None)):
+    """The user's latest result for a test with per-question review, in one response"""
+    try:
+        if not supabase:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Test service is not available. Please check Supabase configuration."
+            )
+        token = _bearer_token(authorization)
+        user = _get_request_user(token)
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="You must be logged in to view results"
+            )
+        with _rest_client(token) as db:
+            result_response = db.from_("test_results").select("id,score,answers,completed_at") \
+                .eq("test_id", test_id).eq("user_id", user["id"]) \
+                .order("completed_at", desc=True).limit(1).execute()
+            if not result_response.data:
+                # No attempt yet: only report the test if the user may take it.
+                test = _fetch_test(db, test_id, user)
+                return {"test": _test_metadata(test), "result": None, "questions": []}
+            result = result_response.data[0]
+
+            # A stored result stays viewable even if the test was unpublished since.
+            test = _fetch_test(db, test_id, user, check_visibility=False)
+
+            # Review the questions the attempt was scored on: the submitted
+            # answers carry one key per question the student was served.
+            answers = result.get("answers") or {}
+            questions = _fetch_questions(db, test_id, REVIEW_FIELDS, question_ids=list(answers.keys()))
+
+        review = []
+        for question in questions:
+            user_answer = answers.get(str(question["id"])) or ""
+            review.append({
+                **question,
+                "user_answer": user_answer,
+                "status": _answer_status(question, user_answer),
+            })
+        return _snapshot_response(request, {
+            "test": _test_metadata(test),
+            "result": {
+                "id": result["id"],
+                "score": result.get("score"),
+                "completed_at": result.get("completed_at"),
+                "total_questions": len(review),
+                "correct_answers": sum(1 for q in review if q["status"] == "correct"),
+            },
+            "questions": review,
+        }, private=True)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to load test results: {str(e)}"
+        )
+
+@router.post("/{test_id}/submit")
+async def submit_test(test_id: str, submission: TestSubmission, authorization: Optional[str] = Header(None)):
+    """Score a submission against the answer key and store the result"""
+    try:
+        if not supabase:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Test service is not available. Please check Supabase configuration."
+            )
+        token = _bearer_token(authorization)
+        user = _get_request_user(token)
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="You must be logged in to submit a test"
+            )
+        with _rest_client(token) as db:
+            _fetch_test(db, test_id, user)
+
+            # Score against the questions the student was served (TakeTest
+            # sends one answer entry per question), so a question approved
+            # mid-attempt does not count against it. A question deleted
+            # mid-attempt has no answer key left and is not scored.
+            answer_key = _fetch_questions(db, test_id, ANSWER_KEY_FIELDS, question_ids=list(submission.answers.keys()))
+            if not answer_key:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="None of the submitted questions belong to this test"
+                )
+            result = _score(answer_key, submission.answers)
+
+            response = db.from_("test_results").insert({
+                "test_id": test_id,
+                "user_id": user["id"],
+                "score": result["score"],
+                "answers": submission.answers,
+                "completed_at": datetime.now(timezone.utc).isoformat()
+            }).execute()
+        if not response.data:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to save test result"
+            )
+
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Test submission failed: {str(e)}"
+        )
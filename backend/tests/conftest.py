@@ -0,0 +1,11 @@
+import os
+import sys
+import types
+
+# Routers import their Supabase client from the app's `db` module; tests
+# stand in for it so no Supabase project is needed.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if "db" not in sys.modules:
+    db = types.ModuleType("db")
+    db.supabase = None
+    sys.modules["db"] = db
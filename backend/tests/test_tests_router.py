@@ -0,0 +1,207 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routers import tests as tests_router
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    """Chainable stand-in for a PostgREST query over an in-memory table"""
+
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.filters = []
+        self.single = False
+        self.row = None
+        self.columns = None
+
+    def select(self, columns="*"):
+        if columns != "*":
+            self.columns = columns.split(",")
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda r: str(r.get(column)) == str(value))
+        return self
+
+    def in_(self, column, values):
+        values = {str(v) for v in values}
+        self.filters.append(lambda r: str(r.get(column)) in values)
+        return self
+
+    def or_(self, *args):
+        return self
+
+    def order(self, *args, **kwargs):
+        return self
+
+    def limit(self, *args):
+        return self
+
+    def maybe_single(self):
+        self.single = True
+        return self
+
+    def insert(self, row):
+        self.row = row
+        return self
+
+    def execute(self):
+        if self.row is not None:
+            self.db.tables.setdefault(self.table, []).append(self.row)
+            return FakeResponse([self.row])
+        rows = [r for r in self.db.tables.get(self.table, []) if all(f(r) for f in self.filters)]
+        if self.columns:
+            rows = [{c: r.get(c) for c in self.columns} for r in rows]
+        if self.single:
+            return FakeResponse(rows[0]) if rows else None
+        return FakeResponse(rows)
+
+
+class FakeDB:
+    def __init__(self, tables):
+        self.tables = tables
+
+    def from_(self, table):
+        return FakeQuery(self, table)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeDB({
+        "tests": [{"id": "t1", "title": "Algebra", "is_published": True, "time_limit": None}],
+        "profiles": [],
+        "questions": [
+            {"id": 1, "test_id": "t1", "approved": True, "question_text": "Q1",
+             "question_type": "multiple_choice", "correct_answer": "A"},
+            {"id": 2, "test_id": "t1", "approved": True, "question_text": "Q2",
+             "question_type": "multiple_choice", "correct_answer": "B"},
+            {"id": 3, "test_id": "t1", "approved": False, "question_text": "Q3",
+             "question_type": "multiple_choice", "correct_answer": "C"},
+        ],
+        "test_results": [],
+    })
+    monkeypatch.setattr(tests_router, "supabase", object())
+    monkeypatch.setattr(tests_router, "_rest_client", lambda token: fake)
+    monkeypatch.setattr(
+        tests_router, "_get_request_user",
+        lambda token: {"id": "u1", "email": "user@example.com"} if token else None,
+    )
+    return fake
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(tests_router.router, prefix="/tests")
+    return TestClient(app)
+
+
+AUTH = {"Authorization": "Bearer token"}
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate, br", True),
+    ("GZIP", True),
+    ("gzip;q=0", False),
+    ("gzip; q=0.0, deflate", False),
+    ("br, *;q=0.5", True),
+    ("*;q=0", False),
+    ("gzip;q=0, *", False),
+    ("identity", False),
+    ("", False),
+])
+def test_accepts_gzip(header, expected):
+    assert tests_router._accepts_gzip(header) is expected
+
+
+def test_etag_matches():
+    assert tests_router._etag_matches('"a", "b-gzip"', '"b-gzip"')
+    assert tests_router._etag_matches('W/"b"', '"b"')
+    assert tests_router._etag_matches("*", '"b"')
+    assert not tests_router._etag_matches('"b"', '"b-gzip"')
+    assert not tests_router._etag_matches("", '"b"')
+
+
+def test_session_omits_answer_keys_and_unapproved_questions(db, client):
+    response = client.get("/tests/t1/session", headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert "Content-Encoding" not in response.headers
+    body = response.json()
+    assert [q["id"] for q in body["questions"]] == [1, 2]
+    assert all("correct_answer" not in q for q in body["questions"])
+
+
+def test_session_gzip_has_its_own_etag_and_revalidates(db, client):
+    plain = client.get("/tests/t1/session", headers={"Accept-Encoding": "identity"})
+    compressed = client.get("/tests/t1/session", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert compressed.headers["ETag"] == plain.headers["ETag"][:-1] + '-gzip"'
+    assert compressed.json() == plain.json()
+
+    not_modified = client.get("/tests/t1/session", headers={
+        "Accept-Encoding": "gzip",
+        "If-None-Match": compressed.headers["ETag"],
+    })
+    assert not_modified.status_code == 304
+
+
+def test_submit_scores_only_served_questions(db, client):
+    # Question 3 was approved after the session was served; it must not
+    # count as unanswered.
+    db.tables["questions"][2]["approved"] = True
+    response = client.post("/tests/t1/submit", headers=AUTH, json={"answers": {"1": "a", "2": "C"}})
+    assert response.status_code == 200
+    assert response.json() == {"score": 50.0, "correct_answers": 1, "total_questions": 2}
+    assert db.tables["test_results"][0]["score"] == 50.0
+
+
+def test_submit_rejects_foreign_questions(db, client):
+    response = client.post("/tests/t1/submit", headers=AUTH, json={"answers": {"99": "A"}})
+    assert response.status_code == 400
+    assert db.tables["test_results"] == []
+
+
+def test_submit_requires_login(db, client):
+    response = client.post("/tests/t1/submit", json={"answers": {"1": "A"}})
+    assert response.status_code == 401
+
+
+def test_results_without_attempt(db, client):
+    response = client.get("/tests/t1/results", headers=AUTH)
+    assert response.status_code == 200
+    assert response.json()["result"] is None
+
+
+def test_results_review_matches_scored_questions(db, client):
+    client.post("/tests/t1/submit", headers=AUTH, json={"answers": {"1": "A", "2": ""}})
+    db.tables["test_results"][0]["id"] = "r1"
+    response = client.get("/tests/t1/results", headers={**AUTH, "Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["result"]["total_questions"] == 2
+    assert body["result"]["correct_answers"] == 1
+    assert [q["status"] for q in body["questions"]] == ["correct", "unanswered"]
+
+
+def test_rest_client_is_authorised_as_caller(monkeypatch):
+    monkeypatch.setenv("SUPABASE_URL", "https://example.supabase.co/")
+    monkeypatch.setenv("SUPABASE_KEY", "anon-key")
+    with tests_router._rest_client("user-jwt") as db:
+        assert db.session.headers["Authorization"] == "Bearer user-jwt"
+        assert db.session.headers["apikey"] == "anon-key"
+        assert str(db.session.base_url).rstrip("/") == "https://example.supabase.co/rest/v1"
+    with tests_router._rest_client(None) as db:
+        assert db.session.headers["Authorization"] == "Bearer anon-key"
@@ -14,6 +14,9 @@ const TakeTest = () => {
   const [error, setError] = useState(null);
   const [timeLeft, setTimeLeft] = useState(null);
   const [testSubmitted, setTestSubmitted] = useState(false);
+  const [submitError, setSubmitError] = useState(null);
+
+  const apiUrl = process.env.REACT_APP_API_URL || 'http://localhost:8000';
 
   // Fetch test and questions
   useEffect(() => {
@@ -21,40 +24,20 @@ const TakeTest = () => {
       try {
         setLoading(true);
         
-        // Fetch test details
-        // Get current user (may be null for anonymous access)
-        const { data: userData } = await supabase.auth.getUser();
+        // Test metadata and questions (without answers) come back in one snapshot
+        const { data: sessionData } = await supabase.auth.getSession();
+        const accessToken = sessionData?.session?.access_token;
         
-        // Determine access rules based on user role
-        let testQuery = supabase
-          .from('tests')
-          .select('*')
-          .eq('id', testId);
-
-        if (userData?.user?.id) {
-          // Check if current user is admin
-          const { data: profileData } = await supabase
-            .from('profiles')
-            .select('is_admin')
-            .eq('id', userData.user.id)
-            .maybeSingle();
-
-          const isAdmin = !!profileData?.is_admin;
-
-          if (!isAdmin) {
-            // Non-admin logged-in users: allow if published OR owner
-            testQuery = testQuery.or(`is_published.eq.true,user_id.eq.${userData.user.id}`);
-          }
-          // For admin we leave the query as is (they can access any test)
-        } else {
-          // Anonymous access: only published tests are visible
-          testQuery = testQuery.eq('is_published', true);
-        }
+        const response = await fetch(`${apiUrl}/tests/${testId}/session`, {
+          headers: accessToken ? { Authorization: `Bearer ${accessToken}` } : {},
+        });
         
-        const { data: testData, error: testError } = await testQuery.maybeSingle();
+        if (!response.ok) {
+          const errorData = await response.json().catch(() => ({ detail: 'Failed to load test' }));
+          throw new Error(errorData.detail || `Failed to load test: ${response.status}`);
+        }
         
-        if (testError) throw testError;
-        if (!testData) throw new Error('Test not found');
+        const { test: testData, questions: questionData } = await response.json();
         
         setTest(testData);
         
@@ -63,16 +46,6 @@ const TakeTest = () => {
           setTimeLeft(testData.time_limit * 60); // Convert minutes to seconds
         }
         
-        // Fetch questions for this test
-        const { data: questionData, error: questionError } = await supabase
-          .from('questions')
-          .select('*')
-          .eq('test_id', testId)
-          .eq('approved', true)
-          .order('id');
-        
-        if (questionError) throw questionError;
-        
         setQuestions(questionData);
         
         // Initialize answers object
@@ -91,7 +64,7 @@ const TakeTest = () => {
     };
     
     fetchTestAndQuestions();
-  }, [testId]);
+  }, [testId, apiUrl]);
   
   // Timer countdown
   useEffect(() => {
@@ -140,33 +113,25 @@ const TakeTest = () => {
   const handleSubmitTest = async () => {
     try {
       setLoading(true);
+      setSubmitError(null);
       
-      // Calculate score
-      let correctAnswers = 0;
-      let totalQuestions = questions.length;
+      // Answers are scored on the backend, which holds the answer key
+      const { data: sessionData } = await supabase.auth.getSession();
+      const accessToken = sessionData?.session?.access_token;
       
-      questions.forEach(question => {
-        if (answers[question.id]?.toLowerCase() === question.correct_answer?.toLowerCase()) {
-          correctAnswers++;
-        }
+      const response = await fetch(`${apiUrl}/tests/${testId}/submit`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+          ...(accessToken ? { Authorization: `Bearer ${accessToken}` } : {}),
+        },
+        body: JSON.stringify({ answers }),
       });
       
-      const score = (correctAnswers / totalQuestions) * 100;
-      
-      // Save test result to database
-      const { data: user } = await supabase.auth.getUser();
-      
-      const { error: resultError } = await supabase
-        .from('test_results')
-        .insert({
-          test_id: testId,
-          user_id: user.user.id,
-          score: score,
-          answers: answers,
-          completed_at: new Date().toISOString()
-        });
-      
-      if (resultError) throw resultError;
+      if (!response.ok) {
+        const errorData = await response.json().catch(() => ({ detail: 'Failed to submit test' }));
+        throw new Error(errorData.detail || `Failed to submit test: ${response.status}`);
+      }
       
       setTestSubmitted(true);
       setLoading(false);
@@ -176,7 +141,8 @@ const TakeTest = () => {
       
     } catch (error) {
       console.error('Error submitting test:', error);
-      setError(error.message);
+      // Keep the answers on the page so the student can submit again
+      setSubmitError(error.message);
       setLoading(false);
     }
   };
@@ -225,6 +191,12 @@ const TakeTest = () => {
         </Card.Header>
         
         <Card.Body>
+          {submitError && (
+            <Alert variant="danger" onClose={() => setSubmitError(null)} dismissible>
+              Could not submit your answers: {submitError}
+            </Alert>
+          )}
+          
           <div className="mb-3">
             <ProgressBar now={progress} label={`${Math.round(progress)}%`} />
             <div className="text-muted mt-1">
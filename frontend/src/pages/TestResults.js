@@ -12,49 +12,33 @@ const TestResults = () => {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
 
+  const apiUrl = process.env.REACT_APP_API_URL || 'http://localhost:8000';
+
   useEffect(() => {
     const fetchResults = async () => {
       try {
         setLoading(true);
         
-        // Get current user
-        const { data: userData } = await supabase.auth.getUser();
-        if (!userData?.user) {
+        const { data: sessionData } = await supabase.auth.getSession();
+        const accessToken = sessionData?.session?.access_token;
+        if (!accessToken) {
           throw new Error('You must be logged in to view results');
         }
         
-        // Fetch test details
-        const { data: testData, error: testError } = await supabase
-          .from('tests')
-          .select('*')
-          .eq('id', testId)
-          .single();
-        
-        if (testError) throw testError;
-        setTest(testData);
-        
-        // Fetch test result
-        const { data: resultData, error: resultError } = await supabase
-          .from('test_results')
-          .select('*')
-          .eq('test_id', testId)
-          .eq('user_id', userData.user.id)
-          .order('completed_at', { ascending: false })
-          .limit(1)
-          .single();
-        
-        if (resultError) throw resultError;
-        setTestResult(resultData);
+        // Test, latest result and per-question status come back in one snapshot
+        const response = await fetch(`${apiUrl}/tests/${testId}/results`, {
+          headers: { Authorization: `Bearer ${accessToken}` },
+        });
         
-        // Fetch questions
-        const { data: questionData, error: questionError } = await supabase
-          .from('questions')
-          .select('*')
-          .eq('test_id', testId)
-          .order('id');
+        if (!response.ok) {
+          const errorData = await response.json().catch(() => ({ detail: 'Failed to load results' }));
+          throw new Error(errorData.detail || `Failed to load results: ${response.status}`);
+        }
         
-        if (questionError) throw questionError;
-        setQuestions(questionData);
+        const snapshot = await response.json();
+        setTest(snapshot.test);
+        setTestResult(snapshot.result);
+        setQuestions(snapshot.questions);
         
         setLoading(false);
       } catch (error) {
@@ -65,7 +49,7 @@ const TestResults = () => {
     };
     
     fetchResults();
-  }, [testId]);
+  }, [testId, apiUrl]);
   
   const getScoreColor = (score) => {
     if (score >= 80) return 'success';
@@ -73,12 +57,6 @@ const TestResults = () => {
     return 'danger';
   };
   
-  const getAnswerStatus = (question, userAnswer) => {
-    if (!userAnswer) return 'unanswered';
-    if (userAnswer.toLowerCase() === question.correct_answer.toLowerCase()) return 'correct';
-    return 'incorrect';
-  };
-  
   if (loading) {
     return (
       <Container className="d-flex justify-content-center align-items-center" style={{ minHeight: '80vh' }}>
@@ -141,14 +119,12 @@ const TestResults = () => {
                     </ListGroup.Item>
                     <ListGroup.Item className="d-flex justify-content-between align-items-center">
                       <span>Total Questions</span>
-                      <span>{questions.length}</span>
+                      <span>{testResult.total_questions}</span>
                     </ListGroup.Item>
                     <ListGroup.Item className="d-flex justify-content-between align-items-center">
                       <span>Correct Answers</span>
                       <span>
-                        {questions.filter(q => 
-                          getAnswerStatus(q, testResult.answers[q.id]) === 'correct'
-                        ).length}
+                        {testResult.correct_answers}
                       </span>
                     </ListGroup.Item>
                   </ListGroup>
@@ -160,8 +136,8 @@ const TestResults = () => {
           <h5 className="mb-3">Question Review</h5>
           
           {questions.map((question, index) => {
-            const userAnswer = testResult.answers[question.id] || '';
-            const status = getAnswerStatus(question, userAnswer);
+            const userAnswer = question.user_answer;
+            const status = question.status;
             
             return (
               <Card key={question.id} className="mb-3">